@@ -0,0 +1,64 @@
+# bench_startup.py
+# Measures per-request process startup cost of the Python workers
+import os
+import sys
+import json
+import time
+import subprocess
+
+# Resolve worker scripts next to this file, whatever the caller's working directory
+WORKER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# (script, payload) pairs; each one is spawned exactly like job-worker.js does
+BENCH_CASES = [
+    ('gpu_task_runner.py', {'operation': 'sum', 'numbers': [1, 2, 3, 4]}),
+    ('game_renderer_simple.py', {'operation': 'render_frame', 'viewport': {'x': 0, 'y': 0, 'width': 64, 'height': 64}}),
+    ('game_renderer.py', {'operation': 'render_frame', 'format': 'svg', 'viewport': {'x': 0, 'y': 0, 'width': 64, 'height': 64}}),
+    ('gpu_task_runner.py', {'operation': 'matrix_mult', 'matrixSize': 4, 'iterations': 1}),
+    ('game_renderer.py', {'operation': 'render_frame', 'viewport': {'x': 0, 'y': 0, 'width': 64, 'height': 64}}),
+]
+
+def spawn_worker(args):
+    """Run a worker script from WORKER_DIR, raising if it exits non-zero"""
+    result = subprocess.run([sys.executable, *args], capture_output=True, text=True, cwd=WORKER_DIR)
+    if result.returncode != 0:
+        raise RuntimeError(f'{" ".join(args[:-1])} exited with {result.returncode}: {result.stderr.strip()[-500:]}')
+    return result
+
+def time_request(script, payload, runs=5):
+    """Spawn the worker `runs` times and return the best wall-clock time"""
+    best = None
+    for _ in range(runs):
+        start_time = time.time()
+        spawn_worker([script, json.dumps(payload)])
+        elapsed = time.time() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def import_time_breakdown(script, payload, top=10):
+    """Run the worker under `-X importtime` and return the slowest top-level imports"""
+    result = spawn_worker(['-X', 'importtime', script, json.dumps(payload)])
+
+    # Lines look like: "import time:  self [us] | cumulative | imported package"
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        # Nested imports are indented; keep top-level ones so nothing is double counted
+        if not name[1:].startswith(' '):
+            imports.append((int(cumulative_us), name.strip()))
+
+    imports.sort(reverse=True)
+    return imports[:top]
+
+if __name__ == '__main__':
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    for script, payload in BENCH_CASES:
+        operation = payload.get('operation')
+        label = f"{script} {operation}" + (f" ({payload['format']})" if 'format' in payload else '')
+        best = time_request(script, payload, runs)
+        print(f'{label}: best of {runs} = {best * 1000:.1f} ms')
+        for cumulative_us, name in import_time_breakdown(script, payload):
+            print(f'    {cumulative_us / 1000:8.1f} ms  {name}')
@@ -1,33 +1,51 @@
 # game_renderer.py - GPU-accelerated game rendering backend
+# Heavy modules (torch, numpy, PIL) are imported inside the operations that need
+# them, for the same reason as in gpu_task_runner.py.
 import sys
 import json
-import torch
-import numpy as np
 import time
-import base64
-from io import BytesIO
-from PIL import Image, ImageDraw, ImageFilter
-import cv2
+from memory_stats import reset_peak_memory, peak_memory
+from rng_streams import resolve_seed, uniform
+from stream_output import DeferredBase64, write_result, summarize_result
 
 def run_game_render(payload):
     """Handle distributed game rendering tasks"""
+    operation = payload.get('operation', 'render_frame')
+    
+    # Torch-free fast path: SVG output is produced by the simplified renderer
+    if operation == 'render_frame' and payload.get('format') == 'svg':
+        from game_renderer_simple import render_frame_simple
+        return render_frame_simple(payload)
+    
+    import torch
     device = 'cuda' if torch.cuda.is_available() else 'cpu'
     
-    operation = payload.get('operation', 'render_frame')
+    reset_peak_memory(device)
     
-    if operation == 'render_frame':
-        return render_frame_tile(payload, device)
+    if operation == 'render_frame' and payload.get('progressive'):
+        emit = emit_stream_line if payload.get('stream') else None
+        result = render_progressive(payload, device, emit)
+    elif operation == 'render_frame':
+        result = render_frame_tile(payload, device)
+    elif operation == 'render_sequence':
+        emit = emit_stream_line if payload.get('stream') else None
+        result = render_sequence(payload, device, emit)
     elif operation == 'compute_lighting':
-        return compute_lighting(payload, device)
+        result = compute_lighting(payload, device)
     elif operation == 'apply_shaders':
-        return apply_shaders(payload, device)
+        result = apply_shaders(payload, device)
     elif operation == 'post_process':
-        return post_process_frame(payload, device)
+        result = post_process_frame(payload, device)
     else:
         raise ValueError(f'Unsupported render operation: {operation}')
+    
+    result['memory'] = peak_memory(device)
+    return result
 
 def render_frame_tile(payload, device):
     """Render a tile of the game frame using GPU acceleration"""
+    import torch
+    
     viewport = payload.get('viewport', {'x': 0, 'y': 0, 'width': 800, 'height': 600})
     scene = payload.get('scene', {})
     objects = payload.get('objects', [])
@@ -42,6 +60,148 @@ def render_frame_tile(payload, device):
     frame_buffer = torch.zeros((height, width, 3), device=device)
     depth_buffer = torch.full((height, width), float('inf'), device=device)
     
+    shaded = shade_frame(objects, scene, quality, viewport, frame_buffer, depth_buffer, device)
+    
+    # Streamed output encodes the PNG straight into the JSON writer instead of building strings
+    if payload.get('streamOutput'):
+        frame_data = deferred_png(frame_to_uint8(shaded))
+    else:
+        frame_data = f'data:image/png;base64,{encode_frame_png(shaded)}'
+    
+    end_time = time.time()
+    render_time = end_time - start_time
+    
+    return {
+        'result': 'Frame tile rendered successfully',
+        'frameData': frame_data,
+        'viewport': viewport,
+        'renderTime': round(render_time, 3),
+        'device': device,
+        'objectsRendered': len(objects),
+        'quality': quality,
+        'resolution': f'{width}x{height}'
+    }
+
+def emit_stream_line(data):
+    """Write one newline-delimited JSON record to stdout immediately"""
+    write_result(data, out=sys.stdout)
+
+def render_progressive(payload, device, emit=None):
+    """Render a fast low-resolution preview first, then refine within a latency budget"""
+    import torch
+    
+    viewport = payload.get('viewport', {'x': 0, 'y': 0, 'width': 800, 'height': 600})
+    scene = payload.get('scene', {})
+    objects = payload.get('objects', [])
+    quality = payload.get('quality', 'high')
+    latency_budget = payload.get('latencyBudget')
+    # Default: quarter-resolution preview without effects, then full resolution at the requested quality
+    passes = payload.get('passes', [
+        {'scale': 0.25, 'quality': 'medium'},
+        {'scale': 1.0, 'quality': quality}
+    ])
+    if not passes:
+        raise ValueError('Progressive render needs at least one pass')
+    
+    width, height = viewport['width'], viewport['height']
+    
+    print(f'Progressive render of {width}x{height} tile on {device} ({len(passes)} passes)', file=sys.stderr)
+    start_time = time.time()
+    
+    deliverables = []
+    
+    for index, render_pass in enumerate(passes):
+        scale = render_pass.get('scale', 1.0)
+        pass_quality = render_pass.get('quality', quality)
+        pass_width = max(1, round(width * scale))
+        pass_height = max(1, round(height * scale))
+        
+        pass_start = time.time()
+        pass_viewport = {**viewport, 'width': pass_width, 'height': pass_height}
+        frame_buffer = torch.zeros((pass_height, pass_width, 3), device=device)
+        depth_buffer = torch.full((pass_height, pass_width), float('inf'), device=device)
+        
+        shaded = shade_frame(scale_objects(objects, scale), scene, pass_quality, pass_viewport,
+                             frame_buffer, depth_buffer, device)
+        
+        # Nearest upsampling so every pass is delivered at the tile's full resolution
+        if (pass_width, pass_height) != (width, height):
+            shaded = torch.nn.functional.interpolate(
+                shaded.permute(2, 0, 1).unsqueeze(0), size=(height, width), mode='nearest'
+            ).squeeze(0).permute(1, 2, 0)
+        
+        # Streamed passes, like render_frame_tile, keep PNG bytes rather than base64 strings
+        if emit is not None or payload.get('streamOutput'):
+            frame_data = deferred_png(frame_to_uint8(shaded))
+        else:
+            frame_data = f'data:image/png;base64,{encode_frame_png(shaded)}'
+        
+        pass_cost = time.time() - pass_start
+        
+        # The first pass always runs; decide now whether the next one fits the budget,
+        # so the pass being delivered can say whether it is the last
+        final = index == len(passes) - 1
+        if not final and latency_budget is not None:
+            next_pass = passes[index + 1]
+            next_scale = next_pass.get('scale', 1.0)
+            next_pixels = max(1, round(width * next_scale)) * max(1, round(height * next_scale))
+            estimate = pass_cost * next_pixels / (pass_width * pass_height)
+            if time.time() - start_time + estimate > latency_budget:
+                print(f'Skipping pass {index + 2}: estimated {estimate:.3f}s exceeds budget', file=sys.stderr)
+                final = True
+        
+        deliverable = {
+            'result': f'Progressive pass {index + 1}/{len(passes)} rendered',
+            'pass': index + 1,
+            'final': final,
+            'frameData': frame_data,
+            'viewport': viewport,
+            'scale': scale,
+            'quality': pass_quality,
+            'renderResolution': f'{pass_width}x{pass_height}',
+            'passTime': round(pass_cost, 3),
+            'elapsed': round(time.time() - start_time, 3),
+            'device': device
+        }
+        if emit is not None:
+            emit(deliverable)
+            del deliverable['frameData']  # already streamed; keep the summary small
+        deliverables.append(deliverable)
+        if final:
+            break
+    
+    end_time = time.time()
+    render_time = end_time - start_time
+    
+    return {
+        'result': f'Progressive frame rendered in {len(deliverables)} of {len(passes)} passes',
+        'passes': deliverables,
+        'viewport': viewport,
+        'renderTime': round(render_time, 3),
+        'device': device,
+        'objectsRendered': len(objects),
+        'quality': deliverables[-1]['quality'],
+        'resolution': f'{width}x{height}'
+    }
+
+def scale_objects(objects, scale):
+    """Return copies of objects with positions and sizes scaled for a reduced-resolution pass"""
+    if scale == 1.0:
+        return objects
+    
+    scaled = []
+    for obj in objects:
+        pos = obj.get('position', {'x': 0, 'y': 0, 'z': 0})
+        size = obj.get('size', {'width': 50, 'height': 50})
+        scaled.append({
+            **obj,
+            'position': {'x': pos.get('x', 0) * scale, 'y': pos.get('y', 0) * scale, 'z': pos.get('z', 0)},
+            'size': {'width': max(1, size['width'] * scale), 'height': max(1, size['height'] * scale)}
+        })
+    return scaled
+
+def shade_frame(objects, scene, quality, viewport, frame_buffer, depth_buffer, device):
+    """Rasterize objects into cleared buffers, then apply lighting and effects"""
     # Simulate 3D rendering pipeline
     for obj in objects:
         render_object_gpu(obj, frame_buffer, depth_buffer, viewport, device)
@@ -54,40 +214,197 @@ def render_frame_tile(payload, device):
     if quality == 'high':
         frame_buffer = apply_gpu_effects(frame_buffer, device)
     
-    # Convert back to CPU and create image
-    frame_cpu = frame_buffer.cpu().numpy()
-    frame_cpu = np.clip(frame_cpu * 255, 0, 255).astype(np.uint8)
+    return frame_buffer
+
+def frame_to_uint8(frame_buffer):
+    """Quantize a float RGB frame buffer to a new uint8 CPU tensor"""
+    import torch
+    
+    # The multiply allocates, so the result never aliases a reused frame buffer
+    return torch.clamp(frame_buffer * 255, 0, 255).to(torch.uint8).cpu()
+
+def encode_png_bytes(frame_u8):
+    """Encode a uint8 (height, width, 3) CPU tensor as PNG bytes"""
+    from io import BytesIO
+    from PIL import Image
     
-    # Convert to PIL Image and encode as base64
-    img = Image.fromarray(frame_cpu)
+    img = Image.fromarray(frame_u8.numpy())
     buffered = BytesIO()
     img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
+    return buffered.getvalue()
+
+def encode_frame_png(frame_buffer):
+    """Encode a float RGB frame buffer as a base64 PNG string"""
+    import base64
+    
+    return base64.b64encode(encode_png_bytes(frame_to_uint8(frame_buffer))).decode()
+
+def deferred_png(frame_u8):
+    """frameData value that PNG-encodes a uint8 frame only when the result is written"""
+    def write_png(fp):
+        from PIL import Image
+        Image.fromarray(frame_u8.numpy()).save(fp, format="PNG")
+    
+    return DeferredBase64('data:image/png;base64,', write_png)
+
+def render_sequence(payload, device, emit=None):
+    """Render N frames of one scene, overlapping GPU rasterization with CPU encoding.
+
+    Inline output without `emit` holds every encoded frame until the result is written;
+    stream it (one record per frame) or use 'files'/'y4m' for long sequences.
+    """
+    import base64
+    import os
+    from collections import deque
+    from concurrent.futures import ThreadPoolExecutor
+    import torch
+    
+    viewport = payload.get('viewport', {'x': 0, 'y': 0, 'width': 800, 'height': 600})
+    scene = payload.get('scene', {})
+    objects = payload.get('objects', [])
+    quality = payload.get('quality', 'medium')
+    frame_count = payload.get('frames', 30)
+    transforms = payload.get('transforms', [])
+    output = payload.get('output', 'inline')
+    fps = payload.get('fps', 30)
+    encode_workers = payload.get('encodeWorkers', 2)
+    
+    if output not in ('inline', 'files', 'y4m'):
+        raise ValueError(f'Unsupported sequence output: {output}')
+    if output == 'files':
+        output_dir = payload['outputDir']
+        os.makedirs(output_dir, exist_ok=True)
+    elif output == 'y4m':
+        output_path = payload['outputPath']
+    
+    width, height = viewport['width'], viewport['height']
+    
+    print(f'Rendering {frame_count} frames at {width}x{height} on {device} ({output})', file=sys.stderr)
+    start_time = time.time()
+    
+    # One frame/depth buffer pair, cleared in place for every frame
+    frame_buffer = torch.zeros((height, width, 3), device=device)
+    depth_buffer = torch.full((height, width), float('inf'), device=device)
+    
+    # Y4M is a planar YUV container, so convert on the device and let the CPU just write
+    def encode(index, frame_u8):
+        if output == 'y4m':
+            return frame_u8.numpy().tobytes()
+        png_bytes = encode_png_bytes(frame_u8)
+        if output == 'files':
+            path = os.path.join(output_dir, f'frame_{index:05d}.png')
+            with open(path, 'wb') as f:
+                f.write(png_bytes)
+            return path
+        return f'data:image/png;base64,{base64.b64encode(png_bytes).decode()}'
+    
+    video_file = None
+    if output == 'y4m':
+        video_file = open(output_path, 'wb')
+        video_file.write(f'YUV4MPEG2 W{width} H{height} F{fps}:1 Ip A1:1 C444\n'.encode())
+    
+    frames = []
+    pending = deque()
+    max_pending = encode_workers * 2  # bounds how many quantized frames are held in memory
+    
+    def finish_oldest():
+        index, future = pending.popleft()
+        encoded = future.result()
+        if video_file is not None:
+            video_file.write(b'FRAME\n')
+            video_file.write(encoded)
+        elif output == 'inline' and emit is not None:
+            emit({'frame': index, 'frameData': encoded})
+        else:
+            frames.append(encoded)
+        print(f'Frame {index + 1}/{frame_count} encoded', file=sys.stderr)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=encode_workers) as pool:
+            for index in range(frame_count):
+                frame_buffer.zero_()
+                depth_buffer.fill_(float('inf'))
+                
+                frame_objects = transform_objects(objects, index, transforms)
+                shaded = shade_frame(frame_objects, scene, quality, viewport, frame_buffer, depth_buffer, device)
+                
+                if output == 'y4m':
+                    frame_u8 = rgb_to_yuv444_planar(shaded)
+                else:
+                    frame_u8 = frame_to_uint8(shaded)
+                
+                # Encoding of this frame overlaps with rasterizing the next one
+                pending.append((index, pool.submit(encode, index, frame_u8)))
+                while len(pending) > max_pending or (pending and pending[0][1].done()):
+                    finish_oldest()
+            
+            while pending:
+                finish_oldest()
+    finally:
+        if video_file is not None:
+            video_file.close()
     
     end_time = time.time()
     render_time = end_time - start_time
     
-    return {
-        'result': 'Frame tile rendered successfully',
-        'frameData': f'data:image/png;base64,{img_str}',
+    result = {
+        'result': f'Sequence of {frame_count} frames rendered successfully',
         'viewport': viewport,
         'renderTime': round(render_time, 3),
+        'framesPerSecond': round(frame_count / render_time, 2) if render_time > 0 else None,
+        'frameCount': frame_count,
         'device': device,
         'objectsRendered': len(objects),
         'quality': quality,
-        'resolution': f'{width}x{height}'
+        'resolution': f'{width}x{height}',
+        'output': output
     }
+    if output == 'inline' and emit is not None:
+        result['framesStreamed'] = frame_count
+    elif output == 'inline':
+        result['frames'] = frames
+    elif output == 'files':
+        result['files'] = frames
+    else:
+        result['videoPath'] = output_path
+    return result
 
-def render_object_gpu(obj, frame_buffer, depth_buffer, viewport, device):
-    """Render a 3D object using GPU-accelerated calculations"""
+def transform_objects(objects, index, transforms):
+    """Return copies of objects moved for frame `index`"""
+    # Objects may carry a per-frame velocity; transforms[index] can translate the whole frame
+    frame_transform = transforms[index] if index < len(transforms) else {}
+    translate = frame_transform.get('translate', {})
+    
+    moved = []
+    for obj in objects:
+        pos = obj.get('position', {'x': 0, 'y': 0, 'z': 0})
+        velocity = obj.get('velocity', {})
+        new_pos = {
+            axis: pos.get(axis, 0) + velocity.get(axis, 0) * index + translate.get(axis, 0)
+            for axis in ('x', 'y', 'z')
+        }
+        moved.append({**obj, 'position': new_pos})
+    return moved
+
+def rgb_to_yuv444_planar(frame_buffer):
+    """Convert a float RGB frame to planar full-range BT.601 YUV bytes on the device"""
+    import torch
+    
+    rgb = torch.clamp(frame_buffer, 0.0, 1.0) * 255
+    r, g, b = rgb[:, :, 0], rgb[:, :, 1], rgb[:, :, 2]
+    y = 0.299 * r + 0.587 * g + 0.114 * b
+    u = 128 - 0.168736 * r - 0.331264 * g + 0.5 * b
+    v = 128 + 0.5 * r - 0.418688 * g - 0.081312 * b
+    return torch.clamp(torch.stack([y, u, v]).round(), 0, 255).to(torch.uint8).cpu()
+
+def object_screen_rect(obj, viewport):
+    """Clipped screen rectangle (x_start, x_end, y_start, y_end) an object covers"""
     pos = obj.get('position', {'x': 0, 'y': 0, 'z': 0})
     size = obj.get('size', {'width': 50, 'height': 50})
-    color = obj.get('color', {'r': 1.0, 'g': 1.0, 'b': 1.0})
     
     # Simple 3D to 2D projection (simplified)
     screen_x = int(pos['x'] + viewport['width'] // 2)
     screen_y = int(pos['y'] + viewport['height'] // 2)
-    z_depth = pos['z']
     
     # Create object geometry tensors
     obj_width = int(size['width'])
@@ -98,6 +415,15 @@ def render_object_gpu(obj, frame_buffer, depth_buffer, viewport, device):
     x_end = min(viewport['width'], screen_x + obj_width // 2)
     y_start = max(0, screen_y - obj_height // 2)
     y_end = min(viewport['height'], screen_y + obj_height // 2)
+    return x_start, x_end, y_start, y_end
+
+def render_object_gpu(obj, frame_buffer, depth_buffer, viewport, device):
+    """Render a 3D object using GPU-accelerated calculations"""
+    pos = obj.get('position', {'x': 0, 'y': 0, 'z': 0})
+    color = obj.get('color', {'r': 1.0, 'g': 1.0, 'b': 1.0})
+    z_depth = pos['z']
+    
+    x_start, x_end, y_start, y_end = object_screen_rect(obj, viewport)
     
     if x_start < x_end and y_start < y_end:
         # Check depth buffer and update pixels
@@ -111,6 +437,8 @@ def render_object_gpu(obj, frame_buffer, depth_buffer, viewport, device):
 
 def apply_gpu_lighting(frame_buffer, lighting_info, device):
     """Apply lighting calculations using GPU"""
+    import torch
+    
     # Simulate ambient lighting
     ambient = lighting_info.get('ambient', 0.2)
     frame_buffer = frame_buffer * (1.0 - ambient) + ambient
@@ -127,6 +455,8 @@ def apply_gpu_lighting(frame_buffer, lighting_info, device):
 
 def apply_gpu_effects(frame_buffer, device):
     """Apply post-processing effects using GPU"""
+    import torch
+    
     # Anti-aliasing using GPU convolution
     kernel = torch.tensor([
         [1, 2, 1],
@@ -148,25 +478,30 @@ def apply_gpu_effects(frame_buffer, device):
 
 def compute_lighting(payload, device):
     """Compute complex lighting calculations on GPU"""
+    import torch
+    
     light_sources = payload.get('lightSources', [])
     surface_normals = payload.get('surfaceNormals', [])
+    seed = resolve_seed(payload)
     
     start_time = time.time()
     
     # Simulate complex lighting calculations
     total_lights = len(light_sources)
     lighting_result = torch.zeros((100, 100, 3), device=device)
+    light_tensor = torch.empty((100, 100, 3), device=device)
     
-    for light in light_sources:
-        # Simulate light contribution calculation
-        light_tensor = torch.rand((100, 100, 3), device=device)
-        lighting_result += light_tensor * light.get('intensity', 1.0)
+    for index, light in enumerate(light_sources):
+        # Simulate light contribution calculation; one stream per light
+        uniform(seed, f'light{index}', (100, 100, 3), device=device, out=light_tensor)
+        lighting_result.add_(light_tensor, alpha=light.get('intensity', 1.0))
     
     end_time = time.time()
     
     return {
         'result': f'Lighting computed for {total_lights} light sources',
         'lightingData': 'computed_lighting_data',
+        'seed': seed,
         'computeTime': round(end_time - start_time, 3),
         'device': device
     }
@@ -175,34 +510,38 @@ def apply_shaders(payload, device):
     """Apply GPU shaders to rendered geometry"""
     shader_type = payload.get('shaderType', 'standard')
     geometry_data = payload.get('geometryData', {})
+    seed = resolve_seed(payload)
     
     start_time = time.time()
     
     # Simulate shader compilation and execution
     if shader_type == 'pbr':
         # Physically Based Rendering shader simulation
-        result_data = simulate_pbr_shader(geometry_data, device)
+        result_data = simulate_pbr_shader(geometry_data, device, seed)
     elif shader_type == 'toon':
         # Toon shading simulation
-        result_data = simulate_toon_shader(geometry_data, device)
+        result_data = simulate_toon_shader(geometry_data, device, seed)
     else:
         # Standard shader
-        result_data = simulate_standard_shader(geometry_data, device)
+        result_data = simulate_standard_shader(geometry_data, device, seed)
     
     end_time = time.time()
     
     return {
         'result': f'{shader_type} shader applied successfully',
         'shaderOutput': result_data,
+        'seed': seed,
         'shaderTime': round(end_time - start_time, 3),
         'device': device
     }
 
-def simulate_pbr_shader(geometry_data, device):
+def simulate_pbr_shader(geometry_data, device, seed):
     """Simulate Physically Based Rendering shader"""
+    import torch
+    
     # Create sample PBR calculations
-    metallic = torch.rand(1, device=device) * 0.8
-    roughness = torch.rand(1, device=device) * 0.6
+    metallic = uniform(seed, 'pbr_metallic', (1,), device=device) * 0.8
+    roughness = uniform(seed, 'pbr_roughness', (1,), device=device) * 0.6
     
     # Simulate complex PBR lighting model
     for i in range(100):  # Simulate computation intensity
@@ -211,36 +550,45 @@ def simulate_pbr_shader(geometry_data, device):
     
     return f'PBR: metallic={metallic.item():.3f}, roughness={roughness.item():.3f}'
 
-def simulate_toon_shader(geometry_data, device):
+def simulate_toon_shader(geometry_data, device, seed):
     """Simulate toon/cartoon shader"""
+    import torch
+    
     # Simulate toon shading calculations
     bands = torch.tensor([0.2, 0.5, 0.8, 1.0], device=device)
     
     for i in range(50):  # Simulate computation
-        quantized = torch.quantile(torch.rand(100, device=device), bands)
+        samples = uniform(seed, 'toon_samples', (100,), offset=i * 100, device=device)
+        quantized = torch.quantile(samples, bands)
     
     return f'Toon shading with {len(bands)} bands applied'
 
-def simulate_standard_shader(geometry_data, device):
+def simulate_standard_shader(geometry_data, device, seed):
     """Simulate standard Phong shader"""
+    import torch
+    
     # Simulate standard lighting model
-    diffuse = torch.rand(1, device=device)
-    specular = torch.rand(1, device=device)
+    diffuse = uniform(seed, 'phong_diffuse', (1,), device=device)
+    specular = uniform(seed, 'phong_specular', (1,), device=device)
     
     for i in range(75):  # Simulate computation
-        lighting = diffuse + specular * torch.pow(torch.rand(1, device=device), 32)
+        lighting = diffuse + specular * torch.pow(uniform(seed, 'phong_samples', (1,), offset=i, device=device), 32)
     
     return f'Standard shading: diffuse={diffuse.item():.3f}, specular={specular.item():.3f}'
 
 def post_process_frame(payload, device):
     """Apply post-processing effects to rendered frame"""
+    import torch
+    
     effects = payload.get('effects', [])
     frame_resolution = payload.get('resolution', {'width': 800, 'height': 600})
+    seed = resolve_seed(payload)
     
     start_time = time.time()
     
     # Simulate post-processing pipeline
-    frame_tensor = torch.rand((frame_resolution['height'], frame_resolution['width'], 3), device=device)
+    frame_shape = (frame_resolution['height'], frame_resolution['width'], 3)
+    frame_tensor = uniform(seed, 'post_process_frame', frame_shape, device=device)
     
     for effect in effects:
         if effect == 'bloom':
@@ -255,6 +603,7 @@ def post_process_frame(payload, device):
     return {
         'result': f'Post-processing applied: {", ".join(effects)}',
         'processedFrame': 'processed_frame_data',
+        'seed': seed,
         'processTime': round(end_time - start_time, 3),
         'device': device,
         'effectsApplied': len(effects)
@@ -262,6 +611,8 @@ def post_process_frame(payload, device):
 
 def apply_bloom_effect(frame_tensor, device):
     """GPU-accelerated bloom effect"""
+    import torch
+    
     # Simulate bloom by blurring bright areas
     bright_mask = frame_tensor > 0.8
     blurred = torch.nn.functional.avg_pool2d(
@@ -273,6 +624,8 @@ def apply_bloom_effect(frame_tensor, device):
 
 def apply_motion_blur(frame_tensor, device):
     """GPU-accelerated motion blur effect"""
+    import torch
+    
     # Simulate motion blur with directional blur
     kernel = torch.ones(7, 1, device=device) / 7.0
     
@@ -285,6 +638,8 @@ def apply_motion_blur(frame_tensor, device):
 
 def apply_color_grading(frame_tensor, device):
     """GPU-accelerated color grading"""
+    import torch
+    
     # Simulate color grading with contrast and saturation adjustments
     contrast = 1.2
     saturation = 1.1
@@ -305,9 +660,11 @@ if __name__ == '__main__':
             sys.exit(1)
         
         payload_str = sys.argv[1]
-        print(f'Received render payload: {payload_str}', file=sys.stderr)
+        print(f'Received render payload: {payload_str[:100]}...', file=sys.stderr)
         
         payload = json.loads(payload_str)
+        # Frames are encoded while the envelope is written rather than held as strings
+        payload.setdefault('streamOutput', True)
         
         print(f'Running game render task: {payload.get("operation", "render_frame")}', file=sys.stderr)
         result = run_game_render(payload)
@@ -316,9 +673,8 @@ if __name__ == '__main__':
         if result is None:
             result = {"error": "Render task returned null result"}
         
-        output = json.dumps(result)
-        print(f'Render output: {output[:100]}...', file=sys.stderr)
-        print(output)
+        print(f'Render output: {summarize_result(result)}', file=sys.stderr)
+        write_result(result, payload.get('resultPath'), sys.stdout)
         
     except json.JSONDecodeError as e:
         error_result = {"error": f"Invalid JSON payload: {str(e)}"}
@@ -4,7 +4,7 @@ import json
 import time
 import math
 import base64
-from io import BytesIO
+from stream_output import DeferredBase64, write_result, summarize_result
 
 def run_game_render(payload):
     """Handle simplified game rendering tasks"""
@@ -42,12 +42,19 @@ def render_frame_simple(payload):
         # Simulate mathematical operations
         result = math.sin(i) * math.cos(i) + math.sqrt(i + 1)
     
-    # Create a simple SVG representation of the rendered frame
-    svg_content = create_simple_svg(objects, width, height)
-    
-    # Convert SVG to base64 (simulate image data)
-    svg_base64 = base64.b64encode(svg_content.encode()).decode()
-    frame_data = f'data:image/svg+xml;base64,{svg_base64}'
+    if payload.get('streamOutput'):
+        # SVG elements are generated and base64-encoded while the result is written
+        def write_svg(fp):
+            for part in iter_svg_parts(objects, width, height):
+                fp.write(part.encode())
+        frame_data = DeferredBase64('data:image/svg+xml;base64,', write_svg)
+    else:
+        # Create a simple SVG representation of the rendered frame
+        svg_content = create_simple_svg(objects, width, height)
+        
+        # Convert SVG to base64 (simulate image data)
+        svg_base64 = base64.b64encode(svg_content.encode()).decode()
+        frame_data = f'data:image/svg+xml;base64,{svg_base64}'
     
     end_time = time.time()
     render_time = end_time - start_time
@@ -66,10 +73,14 @@ def render_frame_simple(payload):
 
 def create_simple_svg(objects, width, height):
     """Create a simple SVG representation of the scene"""
-    svg_header = f'''<svg width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg">
-    <rect width="100%" height="100%" fill="#000011"/>'''
+    return ''.join(iter_svg_parts(objects, width, height))
+
+def iter_svg_parts(objects, width, height):
+    """Yield the SVG document piece by piece so it can be streamed"""
+    yield f'''<svg width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg">
+    <rect width="100%" height="100%" fill="#000011"/>''' + '\n'
     
-    svg_objects = []
+    first = True
     for obj in objects:
         pos = obj.get('position', {'x': 0, 'y': 0})
         size = obj.get('size', {'width': 50, 'height': 50})
@@ -87,20 +98,24 @@ def create_simple_svg(objects, width, height):
         fill_color = f'rgb({r},{g},{b})'
         
         if obj_type == 'cube':
-            svg_objects.append(f'''<rect x="{screen_x - size['width']//2}" y="{screen_y - size['height']//2}" 
+            element = f'''<rect x="{screen_x - size['width']//2}" y="{screen_y - size['height']//2}" 
                                  width="{size['width']}" height="{size['height']}" 
-                                 fill="{fill_color}" stroke="white" stroke-width="1"/>''')
+                                 fill="{fill_color}" stroke="white" stroke-width="1"/>'''
         elif obj_type == 'sphere':
             radius = min(size['width'], size['height']) // 2
-            svg_objects.append(f'''<circle cx="{screen_x}" cy="{screen_y}" r="{radius}" 
-                                 fill="{fill_color}" stroke="white" stroke-width="1"/>''')
+            element = f'''<circle cx="{screen_x}" cy="{screen_y}" r="{radius}" 
+                                 fill="{fill_color}" stroke="white" stroke-width="1"/>'''
         elif obj_type == 'triangle':
             points = f"{screen_x},{screen_y - size['height']//2} {screen_x - size['width']//2},{screen_y + size['height']//2} {screen_x + size['width']//2},{screen_y + size['height']//2}"
-            svg_objects.append(f'''<polygon points="{points}" fill="{fill_color}" stroke="white" stroke-width="1"/>''')
-    
-    svg_footer = '</svg>'
+            element = f'''<polygon points="{points}" fill="{fill_color}" stroke="white" stroke-width="1"/>'''
+        else:
+            continue
+        
+        # Elements are newline-separated, matching the original joined document
+        yield element if first else '\n' + element
+        first = False
     
-    return svg_header + '\n' + '\n'.join(svg_objects) + '\n' + svg_footer
+    yield '\n</svg>'
 
 def compute_lighting_simple(payload):
     """Simplified lighting computation"""
@@ -187,6 +202,8 @@ if __name__ == '__main__':
         print(f'Received render payload: {payload_str[:100]}...', file=sys.stderr)
         
         payload = json.loads(payload_str)
+        # SVG is generated while the envelope is written rather than held as strings
+        payload.setdefault('streamOutput', True)
         
         print(f'Running game render task: {payload.get("operation", "render_frame")}', file=sys.stderr)
         result = run_game_render(payload)
@@ -195,9 +212,8 @@ if __name__ == '__main__':
         if result is None:
             result = {"error": "Render task returned null result"}
         
-        output = json.dumps(result)
-        print(f'Render completed successfully', file=sys.stderr)
-        print(output)
+        print(f'Render completed successfully: {summarize_result(result)}', file=sys.stderr)
+        write_result(result, payload.get('resultPath'), sys.stdout)
         
     except json.JSONDecodeError as e:
         error_result = {"error": f"Invalid JSON payload: {str(e)}"}
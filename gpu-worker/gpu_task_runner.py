@@ -1,13 +1,22 @@
 # gpu_task_runner.py
 # Enhanced GPU task runner with multiple intensive operations
+# torch is imported inside each operation rather than at module load: every task
+# runs in a fresh process, so trivial operations should not pay torch's import cost.
 import sys
 import json
-import torch
 import time
-import numpy as np
+from memory_stats import reset_peak_memory, peak_memory
+from rng_streams import resolve_seed, normal, randint, uniform, random_words
+from stream_output import write_result, summarize_result
 
 def run_gpu_task(payload, operation='sum'):
     """Run various GPU-intensive tasks"""
+    # Torch-free fast path for trivial operations
+    if operation == 'sum' and is_plain_numbers(payload.get('numbers', [])):
+        return sum_numbers(payload.get('numbers', []))
+
+    import torch
+
     # Force use of CUDA (GPU) if available, else use CPU with warning
     device = 'cuda' if torch.cuda.is_available() else 'cpu'
     if device == 'cpu':
@@ -15,16 +24,18 @@ def run_gpu_task(payload, operation='sum'):
     
     print(f'Running {operation} on {device}', file=sys.stderr)
     
+    reset_peak_memory(device)
+    
     if operation == 'matrix_mult':
-        return run_matrix_multiplication(payload, device)
+        result = run_matrix_multiplication(payload, device)
     elif operation == 'image_filter':
-        return run_image_processing(payload, device)
+        result = run_image_processing(payload, device)
     elif operation == 'neural_train':
-        return run_neural_training(payload, device)
+        result = run_neural_training(payload, device)
     elif operation == 'crypto_hash':
-        return run_crypto_hashing(payload, device)
+        result = run_crypto_hashing(payload, device)
     elif operation == 'monte_carlo':
-        return run_monte_carlo(payload, device)
+        result = run_monte_carlo(payload, device)
     elif operation == 'sum':
         # Legacy sum operation
         if 'numbers' in payload:
@@ -34,19 +45,44 @@ def run_gpu_task(payload, operation='sum'):
             return 0
     else:
         raise ValueError(f'Unsupported operation: {operation}')
+    
+    result['memory'] = peak_memory(device)
+    return result
+
+def is_plain_numbers(numbers):
+    """Check whether a (possibly nested) list holds only ints and floats"""
+    if not isinstance(numbers, list):
+        return False
+    for item in numbers:
+        if isinstance(item, list):
+            if not is_plain_numbers(item):
+                return False
+        elif isinstance(item, bool) or not isinstance(item, (int, float)):
+            return False
+    return True
+
+def sum_numbers(numbers):
+    """Sum a (possibly nested) list of numbers without torch"""
+    total = 0
+    for item in numbers:
+        total += sum_numbers(item) if isinstance(item, list) else item
+    return total
 
 def run_matrix_multiplication(payload, device):
     """GPU-intensive matrix multiplication"""
+    import torch
+
     size = payload.get('matrixSize', 512)
     iterations = payload.get('iterations', 10)
-      # Create random matrices
-    a = torch.randn(size, size, device=device)
-    b = torch.randn(size, size, device=device)
+    seed = resolve_seed(payload)
+    # Create random matrices; any peer can regenerate them from the seed
+    a = normal(seed, 'matrix_a', (size, size), device=device)
+    b = normal(seed, 'matrix_b', (size, size), device=device)
+    result_matrix = torch.empty((size, size), device=device)
     
     start_time = time.time()
-    result_matrix = None
     for i in range(iterations):
-        result_matrix = torch.matmul(a, b)
+        torch.matmul(a, b, out=result_matrix)
         if device == 'cuda':
             torch.cuda.synchronize()  # Ensure GPU work is complete
     
@@ -64,9 +100,15 @@ def run_matrix_multiplication(payload, device):
     matrix_max = result_cpu.max().item()
     matrix_min = result_cpu.min().item()
     
-    return {
+    # Hash of the full float32 result so a verifier can check a separately delivered matrix
+    import hashlib
+    result_hash = hashlib.sha256(result_cpu.contiguous().numpy().tobytes()).hexdigest()
+    full_result = result_cpu.tolist() if payload.get('returnResult') else None
+    
+    output = {
         'result': f'Matrix multiplication completed - {size}x{size} matrices',
         'sample_result': sample_result,
+        'result_hash': result_hash,
         'statistics': {
             'sum': round(matrix_sum, 3),
             'mean': round(matrix_mean, 3),
@@ -75,24 +117,32 @@ def run_matrix_multiplication(payload, device):
         },
         'size': size,
         'iterations': iterations,
+        'seed': seed,
         'time': round(computation_time, 3),
         'device': device
     }
+    if full_result is not None:
+        output['result_matrix'] = full_result
+    return output
 
 def run_image_processing(payload, device):
     """GPU-intensive image processing simulation"""
+    import torch
+
     image_size = payload.get('imageSize', 1024)
     iterations = payload.get('iterations', 5)
     
     # Create a fake image tensor
-    image = torch.randn(3, image_size, image_size, device=device)
+    seed = resolve_seed(payload)
+    image = normal(seed, 'image', (3, image_size, image_size), device=device)
+    
+    # Box-blur kernel, built once rather than per iteration
+    kernel = torch.full((3, 1, 3, 3), 1.0 / 9.0, device=device)
     
     start_time = time.time()
     for i in range(iterations):
         # Apply Gaussian blur-like convolution
-        kernel = torch.ones(3, 3, device=device) / 9.0
-        # Simulate convolution operation
-        processed = torch.conv2d(image.unsqueeze(0), kernel.unsqueeze(0).unsqueeze(0).repeat(3,1,1,1), padding=1, groups=3)
+        processed = torch.conv2d(image.unsqueeze(0), kernel, padding=1, groups=3)
         if device == 'cuda':
             torch.cuda.synchronize()
     
@@ -103,12 +153,15 @@ def run_image_processing(payload, device):
         'result': f'Image processing completed',
         'image_size': image_size,
         'iterations': iterations,
+        'seed': seed,
         'time': round(computation_time, 3),
         'device': device
     }
 
 def run_neural_training(payload, device):
     """GPU-intensive neural network training simulation"""
+    import torch
+
     batch_size = payload.get('batchSize', 64)
     epochs = payload.get('epochs', 5)
     layers = payload.get('layers', [128, 64, 32])
@@ -126,9 +179,19 @@ def run_neural_training(payload, device):
     model_layers.append(torch.nn.Linear(prev_size, 10))  # Output layer
     model = torch.nn.Sequential(*model_layers).to(device)
     
+    # Re-initialize parameters from the job's streams (same bounds as nn.Linear's default)
+    seed = resolve_seed(payload)
+    with torch.no_grad():
+        for index, layer in enumerate(model):
+            if isinstance(layer, torch.nn.Linear):
+                bound = 1.0 / layer.in_features ** 0.5
+                for name, param in (('weight', layer.weight), ('bias', layer.bias)):
+                    values = uniform(seed, f'layer{index}.{name}', param.shape, device=device)
+                    param.copy_(values * 2 * bound - bound)
+    
     # Fake training data
-    x = torch.randn(batch_size, input_size, device=device)
-    y = torch.randint(0, 10, (batch_size,), device=device)
+    x = normal(seed, 'inputs', (batch_size, input_size), device=device)
+    y = randint(seed, 'labels', 0, 10, (batch_size,), device=device)
     
     criterion = torch.nn.CrossEntropyLoss()
     optimizer = torch.optim.Adam(model.parameters(), lr=0.001)
@@ -152,17 +215,24 @@ def run_neural_training(payload, device):
         'epochs': epochs,
         'batch_size': batch_size,
         'layers': layers,
+        'seed': seed,
         'time': round(computation_time, 3),
         'device': device
     }
 
 def run_crypto_hashing(payload, device):
     """GPU-intensive crypto-like hashing simulation"""
+    import torch
+
+    if payload.get('mode') == 'search':
+        return run_crypto_search(payload, device)
+
     iterations = payload.get('iterations', 100000)
     difficulty = payload.get('difficulty', 1)
     
     # Simulate crypto hashing with repeated operations
-    data = torch.randint(0, 256, (1000,), device=device, dtype=torch.uint8)
+    seed = resolve_seed(payload)
+    data = randint(seed, 'crypto_data', 0, 256, (1000,), device=device).to(torch.uint8)
     
     start_time = time.time()
     hash_count = 0
@@ -182,20 +252,132 @@ def run_crypto_hashing(payload, device):
         'iterations': iterations,
         'valid_hashes': hash_count,
         'difficulty': difficulty,
+        'seed': seed,
+        'time': round(computation_time, 3),
+        'device': device
+    }
+
+def run_crypto_search(payload, device):
+    """Batched nonce search that stops at the first valid hashes or a deadline.
+
+    Workers splitting one search must hash the same block data, so `seed` is required
+    when workerCount > 1; a single worker falls back to resolve_seed like scan mode.
+    """
+    import torch
+
+    iterations = payload.get('iterations', 100000)
+    difficulty = payload.get('difficulty', 1)
+    batch_size = payload.get('batchSize', 4096)
+    target_hits = payload.get('targetHits', 1)
+    top_k = payload.get('topK', target_hits)
+    time_limit = payload.get('timeLimit')
+    # Worker w of W scans nonces w, w+W, w+2W, ... so partitions never overlap
+    worker_index = payload.get('workerIndex', 0)
+    worker_count = payload.get('workerCount', 1)
+
+    if not 0 <= worker_index < worker_count:
+        raise ValueError(f'workerIndex must be in [0, {worker_count})')
+    if worker_count > 1 and payload.get('seed') is None:
+        raise ValueError('seed is required when workerCount > 1')
+    seed = resolve_seed(payload)
+
+    data = randint(seed, 'crypto_data', 0, 256, (1000,), device=device)
+    modulus = 10 ** difficulty
+
+    start_time = time.time()
+    deadline = start_time + time_limit if time_limit is not None else None
+    found_nonces = []
+    found_hashes = []
+    best_hashes = torch.empty(0, dtype=torch.int64, device=device)
+    best_nonces = torch.empty(0, dtype=torch.int64, device=device)
+    scanned = 0
+    stop_reason = 'exhausted'
+
+    for batch_start in range(worker_index, iterations, batch_size * worker_count):
+        batch_end = min(iterations, batch_start + batch_size * worker_count)
+        nonces = torch.arange(batch_start, batch_end, worker_count, device=device, dtype=torch.int64)
+
+        # Same hash as the scan mode: uint8 products wrap mod 256 before summing
+        hashes = (((nonces.unsqueeze(1) + 1) * data) % 256).sum(dim=1) % (2**32)
+        hits = hashes % modulus == 0
+        scanned += nonces.numel()
+
+        # Keep the running best (lowest) hashes on device
+        if top_k > 0:
+            best_hashes = torch.cat([best_hashes, hashes])
+            best_nonces = torch.cat([best_nonces, nonces])
+            k = min(top_k, best_hashes.numel())
+            best_hashes, order = torch.topk(best_hashes, k, largest=False, sorted=True)
+            best_nonces = best_nonces[order]
+
+        # Single device->host sync per batch
+        if hits.any().item():
+            found_nonces.extend(nonces[hits].tolist())
+            found_hashes.extend(hashes[hits].tolist())
+            if len(found_nonces) >= target_hits:
+                found_nonces = found_nonces[:target_hits]
+                found_hashes = found_hashes[:target_hits]
+                stop_reason = 'target'
+                break
+
+        if deadline is not None and time.time() >= deadline:
+            stop_reason = 'deadline'
+            break
+
+    if device == 'cuda':
+        torch.cuda.synchronize()
+
+    end_time = time.time()
+    computation_time = end_time - start_time
+
+    return {
+        'result': f'Crypto nonce search completed ({stop_reason})',
+        'mode': 'search',
+        'nonces': found_nonces,
+        'hashes': found_hashes,
+        'best_nonces': [
+            {'nonce': nonce, 'hash': value}
+            for nonce, value in zip(best_nonces.tolist(), best_hashes.tolist())
+        ],
+        'valid_hashes': len(found_nonces),
+        'nonces_scanned': scanned,
+        'hash_rate': round(scanned / computation_time, 1) if computation_time > 0 else None,
+        'stop_reason': stop_reason,
+        'difficulty': difficulty,
+        'seed': seed,
+        'worker_index': worker_index,
+        'worker_count': worker_count,
         'time': round(computation_time, 3),
         'device': device
     }
 
 def run_monte_carlo(payload, device):
     """GPU-intensive Monte Carlo simulation"""
+    import torch
+
     simulations = payload.get('simulations', 1000000)
+    batch_size = payload.get('batchSize', 1 << 20)
+    seed = resolve_seed(payload)
+    # A chunk covers global samples [offset, offset + simulations); sample i is the same
+    # on every peer, so per-chunk inside counts add up to the unsplit run exactly
+    if 'chunkIndex' in payload:
+        sample_offset = payload['chunkIndex'] * payload.get('chunkSize', simulations)
+    else:
+        sample_offset = payload.get('sampleOffset', 0)
     
     # Monte Carlo estimation of Pi
     start_time = time.time()
-    points = torch.rand(simulations, 2, device=device) * 2 - 1  # Random points in [-1,1]x[-1,1]
-    distances = torch.sum(points**2, dim=1)  # Distance from origin
-    inside_circle = torch.sum(distances <= 1.0).item()  # Points inside unit circle
-    pi_estimate = 4.0 * inside_circle / simulations
+    inside = torch.zeros((), dtype=torch.int64, device=device)
+    for batch_start in range(0, simulations, batch_size):
+        count = min(batch_size, simulations - batch_start)
+        # Sample i uses stream elements 2i and 2i+1 as 24-bit x and y
+        words = random_words(seed, 'monte_carlo', 2 * (sample_offset + batch_start), 2 * count, device)
+        # Odd integers in (-2^24, 2^24) stand for points in (-1, 1); the test is exact in int64
+        coords = 2 * (words >> 8).view(count, 2) - ((1 << 24) - 1)
+        distances = torch.sum(coords * coords, dim=1)  # Distance from origin
+        inside += torch.sum(distances <= (1 << 48))  # Points inside unit circle
+    inside_circle = inside.item()
+    pi_estimate = 4.0 * inside_circle / simulations if simulations else 0.0
     
     if device == 'cuda':
         torch.cuda.synchronize()
@@ -206,6 +388,9 @@ def run_monte_carlo(payload, device):
     return {
         'result': f'Monte Carlo simulation completed',
         'simulations': simulations,
+        'inside_circle': inside_circle,
+        'sample_offset': sample_offset,
+        'seed': seed,
         'pi_estimate': round(pi_estimate, 6),
         'time': round(computation_time, 3),
         'device': device
@@ -231,9 +416,14 @@ if __name__ == "__main__":
         if result is None:
             result = {"error": "Task returned null result"}
         
-        output = json.dumps(result)
-        print(f'Task output: {output}', file=sys.stderr)
-        print(output)
+        # Large results (returnResult matrices) are written incrementally, not built as one string
+        if isinstance(result, dict):
+            print(f'Task output: {summarize_result(result)}', file=sys.stderr)
+            write_result(result, payload.get('resultPath'), sys.stdout)
+        else:
+            output = json.dumps(result)
+            print(f'Task output: {output}', file=sys.stderr)
+            print(output)
         
     except json.JSONDecodeError as e:
         error_result = {"error": f"Invalid JSON payload: {str(e)}"}
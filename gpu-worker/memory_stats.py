@@ -0,0 +1,46 @@
+# memory_stats.py
+# Peak memory accounting for a single operation
+#
+# Both dispatchers attach peak_memory() to their result so the scheduler can pack
+# jobs onto peers by measured footprint.
+import sys
+import resource
+
+# Process high-water mark (bytes) when the current CPU window started
+_rss_baseline = {'maxRss': None}
+
+def _max_rss_bytes():
+    # ru_maxrss is kilobytes on Linux but bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+def reset_peak_memory(device):
+    """Start a fresh peak-memory window: reset the CUDA peak, or record the CPU high-water mark"""
+    if device == 'cuda':
+        import torch
+        torch.cuda.reset_peak_memory_stats()
+    else:
+        _rss_baseline['maxRss'] = _max_rss_bytes()
+
+def peak_memory(device):
+    """Peak memory since reset_peak_memory.
+
+    CUDA reports the allocator peak. The CPU has no resettable peak, so peakBytes is how far
+    the operation raised the process high-water mark (a lower bound on its footprint: memory
+    it used below an earlier peak is not counted); processPeakBytes is the lifetime peak,
+    interpreter and imports included.
+    """
+    if device == 'cuda':
+        import torch
+        return {
+            'peakBytes': torch.cuda.max_memory_allocated(),
+            'source': 'cuda_max_memory_allocated'
+        }
+
+    process_peak = _max_rss_bytes()
+    baseline = _rss_baseline['maxRss']
+    return {
+        'peakBytes': process_peak - baseline if baseline is not None else None,
+        'processPeakBytes': process_peak,
+        'source': 'ru_maxrss_growth'
+    }
@@ -0,0 +1,229 @@
+# result_verifier.py
+# Cheap probabilistic checks of results returned by untrusted peers
+import sys
+import json
+import hashlib
+import random
+import secrets
+
+from rng_streams import normal
+
+# Challenges must be unpredictable to the peer that produced the result
+_challenge_rng = random.SystemRandom()
+
+FLOAT32_EPS = 1.1920929e-07
+
+def verify_result(payload, result, rounds=None, samples=None):
+    """Dispatch a verification by the operation the payload requested"""
+    operation = payload.get('operation')
+    if operation == 'matrix_mult':
+        return verify_matrix_multiplication(payload, result, rounds or 8)
+    elif operation == 'render_frame':
+        return verify_render_tile(payload, result, samples or 64)
+    elif operation == 'monte_carlo':
+        return verify_monte_carlo_chunks(payload, result, samples or 2)
+    else:
+        raise ValueError(f'Unsupported verification: {operation}')
+
+def verify_matrix_multiplication(payload, result, rounds=8):
+    """Freivalds' check of C = A @ B in O(n^2) per round against regenerated inputs"""
+    import torch
+
+    if 'result_matrix' not in result:
+        raise ValueError('Full result_matrix required; run the task with returnResult')
+    if payload.get('seed') is None:
+        raise ValueError('Payload must set seed so the inputs can be regenerated')
+
+    # The seed comes from the job we issued, never from the peer's report
+    size = payload.get('matrixSize', 512)
+    seed = int(payload['seed'])
+    if result.get('seed') != seed:
+        return {'verified': False, 'reason': f"result seed {result.get('seed')} != payload seed {seed}"}
+    c = torch.tensor(result['result_matrix'], dtype=torch.float32)
+    if c.shape != (size, size):
+        return {'verified': False, 'reason': f'result shape {tuple(c.shape)} != ({size}, {size})'}
+
+    # The matrix must be the one the peer committed to
+    if 'result_hash' in result:
+        actual_hash = hashlib.sha256(c.numpy().tobytes()).hexdigest()
+        if actual_hash != result['result_hash']:
+            return {'verified': False, 'reason': 'result_matrix does not match result_hash'}
+
+    # Same streams as run_matrix_multiplication; checked in float64 so only the peer's error counts
+    a = normal(seed, 'matrix_a', (size, size)).to(torch.float64)
+    b = normal(seed, 'matrix_b', (size, size)).to(torch.float64)
+    c = c.to(torch.float64)
+    # Honest float32 error in (C r)_i scales like eps * sqrt(n) * |A_i| * rms column norm of B;
+    # `tolerance` is the slack multiplier on that estimate
+    tolerance = payload.get('verifyTolerance', 8.0)
+    row_scale = a.norm(dim=1) * b.norm(dim=0).pow(2).mean().sqrt()
+    bound = tolerance * FLOAT32_EPS * size ** 0.5 * row_scale + 1e-9
+
+    generator = torch.Generator().manual_seed(secrets.randbits(63))
+    for round_index in range(rounds):
+        r = torch.randint(0, 2, (size,), generator=generator, dtype=torch.float64) * 2 - 1
+        residual = a @ (b @ r) - c @ r
+        if bool((residual.abs() > bound).any()):
+            row = int((residual.abs() - bound).argmax())
+            return {
+                'verified': False,
+                'reason': f'Freivalds round {round_index + 1} failed at row {row}',
+                'rounds': round_index + 1
+            }
+
+    # A wrong product slips through each +/-1 round with probability <= 1/2
+    return {'verified': True, 'rounds': rounds, 'falseAcceptBound': 0.5 ** rounds}
+
+def decode_frame(frame_data):
+    """Decode a data:image/png;base64 frame into a (height, width, 3) uint8 array"""
+    import base64
+    from io import BytesIO
+    import numpy as np
+    from PIL import Image
+
+    encoded = frame_data.split(',', 1)[1]
+    return np.asarray(Image.open(BytesIO(base64.b64decode(encoded))).convert('RGB'))
+
+def base_pixel(objects, viewport, x, y):
+    """Rasterized color at (x, y) before lighting, following render_object_gpu's z-test"""
+    import numpy as np
+    from game_renderer import object_screen_rect
+
+    if not (0 <= x < viewport['width'] and 0 <= y < viewport['height']):
+        return (0.0, 0.0, 0.0)  # conv2d zero padding
+
+    color = (0.0, 0.0, 0.0)
+    depth = float('inf')
+    for obj in objects:
+        x_start, x_end, y_start, y_end = object_screen_rect(obj, viewport)
+        if x_start <= x < x_end and y_start <= y < y_end:
+            z_depth = obj.get('position', {'x': 0, 'y': 0, 'z': 0})['z']
+            # Strict test against the float32 depth buffer: first drawn wins ties
+            if z_depth < depth:
+                depth = float(np.float32(z_depth))
+                c = obj.get('color', {'r': 1.0, 'g': 1.0, 'b': 1.0})
+                color = (float(np.float32(c['r'])), float(np.float32(c['g'])), float(np.float32(c['b'])))
+    return color
+
+def shaded_pixel(objects, scene, quality, viewport, x, y):
+    """Expected float color at (x, y) after lighting and effects"""
+    lighting = scene.get('lighting')
+
+    def lit(px, py):
+        color = base_pixel(objects, viewport, px, py)
+        if not (0 <= px < viewport['width'] and 0 <= py < viewport['height']):
+            return color
+        if lighting:
+            ambient = lighting.get('ambient', 0.2)
+            intensity = lighting['directional'].get('intensity', 1.0) if 'directional' in lighting else 1.0
+            color = tuple(min(1.0, max(0.0, (v * (1.0 - ambient) + ambient) * intensity)) for v in color)
+        return color
+
+    if quality != 'high':
+        return lit(x, y)
+
+    # apply_gpu_effects' 3x3 binomial blur with zero padding
+    weights = {-1: 1, 0: 2, 1: 1}
+    total = [0.0, 0.0, 0.0]
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            neighbour = lit(x + dx, y + dy)
+            for channel in range(3):
+                total[channel] += neighbour[channel] * weights[dx] * weights[dy] / 16.0
+    return tuple(total)
+
+def verify_render_tile(payload, result, samples=64, tolerance=2):
+    """Spot-check random pixels of a rendered tile against a CPU re-rasterization"""
+    viewport = payload.get('viewport', {'x': 0, 'y': 0, 'width': 800, 'height': 600})
+    scene = payload.get('scene', {})
+    objects = payload.get('objects', [])
+    quality = payload.get('quality', 'medium')
+
+    frame = decode_frame(result['frameData'])
+    width, height = viewport['width'], viewport['height']
+    if frame.shape[:2] != (height, width):
+        return {'verified': False, 'reason': f'frame is {frame.shape[1]}x{frame.shape[0]}, expected {width}x{height}'}
+
+    for _ in range(samples):
+        x = _challenge_rng.randrange(width)
+        y = _challenge_rng.randrange(height)
+        expected = [min(255, max(0, int(v * 255))) for v in shaded_pixel(objects, scene, quality, viewport, x, y)]
+        actual = [int(v) for v in frame[y, x]]
+        # Float32 rounding on the peer can move a channel across a quantization step
+        if any(abs(e - a) > tolerance for e, a in zip(expected, actual)):
+            return {
+                'verified': False,
+                'reason': f'pixel ({x}, {y}) is {actual}, expected {expected}',
+                'samples': samples
+            }
+
+    return {'verified': True, 'samples': samples}
+
+def verify_monte_carlo_chunks(payload, chunk_results, samples=2):
+    """Re-run a random subset of Monte Carlo chunks and compare exact inside counts"""
+    from gpu_task_runner import run_monte_carlo
+
+    if payload.get('seed') is None or 'simulations' not in payload:
+        raise ValueError('Payload must set seed and simulations')
+    seed = int(payload['seed'])
+    simulations = payload['simulations']
+
+    # Chunks must tile [0, simulations) exactly, so no sample is counted twice or skipped
+    chunk_results = sorted(chunk_results, key=lambda chunk: chunk['sample_offset'])
+    position = 0
+    for index, chunk in enumerate(chunk_results):
+        if chunk['seed'] != seed:
+            return {'verified': False, 'reason': f"chunk {index} seed {chunk['seed']} != payload seed {seed}"}
+        if chunk['sample_offset'] != position or chunk['simulations'] <= 0:
+            return {
+                'verified': False,
+                'reason': f"chunk {index} covers [{chunk['sample_offset']}, "
+                          f"{chunk['sample_offset'] + chunk['simulations']}), expected it to start at {position}"
+            }
+        position += chunk['simulations']
+    if position != simulations:
+        return {'verified': False, 'reason': f'chunks cover [0, {position}), expected [0, {simulations})'}
+
+    checked = _challenge_rng.sample(range(len(chunk_results)), min(samples, len(chunk_results)))
+    for index in checked:
+        chunk = chunk_results[index]
+        rerun = run_monte_carlo({
+            'simulations': chunk['simulations'],
+            'sampleOffset': chunk['sample_offset'],
+            'seed': seed,
+            'batchSize': payload.get('batchSize', 1 << 20)
+        }, 'cpu')
+        if rerun['inside_circle'] != chunk['inside_circle']:
+            return {
+                'verified': False,
+                'reason': f"chunk {index} reported {chunk['inside_circle']} inside, recomputed {rerun['inside_circle']}",
+                'chunksChecked': checked
+            }
+
+    total_inside = sum(chunk['inside_circle'] for chunk in chunk_results)
+    return {
+        'verified': True,
+        'chunksChecked': checked,
+        'inside_circle': total_inside,
+        'simulations': simulations,
+        'pi_estimate': round(4.0 * total_inside / simulations, 6) if simulations else 0.0
+    }
+
+# Example usage:
+if __name__ == '__main__':
+    try:
+        if len(sys.argv) < 3:
+            # matrix_mult payloads must set seed and returnResult; monte_carlo results are a list of chunks
+            print('{"error": "Usage: result_verifier.py <payload with seed (and returnResult for matrix_mult)> <result>"}')
+            sys.exit(1)
+
+        payload = json.loads(sys.argv[1])
+        result = json.loads(sys.argv[2])
+        print(f'Verifying {payload.get("operation")} result', file=sys.stderr)
+        print(json.dumps(verify_result(payload, result)))
+
+    except json.JSONDecodeError as e:
+        print(json.dumps({"error": f"Invalid JSON: {str(e)}"}))
+    except Exception as e:
+        print(f'ERROR: {str(e)}', file=sys.stderr)
+        print(json.dumps({"error": f"Verification failed: {str(e)}"}))
@@ -0,0 +1,138 @@
+# rng_streams.py
+# Counter-based (Philox4x32-10) random streams for reproducible distributed operations
+#
+# Every random value is a pure function of (seed, stream, element index), so any
+# chunk of a stream can be regenerated on any peer without replaying the chunks
+# before it. Integer words and uniforms are bit-identical on CPU and CUDA;
+# normals go through log/cos and may differ in the last ulp between devices.
+import zlib
+
+PHILOX_M0 = 0xD2511F53
+PHILOX_M1 = 0xCD9E8D57
+PHILOX_W0 = 0x9E3779B9
+PHILOX_W1 = 0xBB67AE85
+PHILOX_ROUNDS = 10
+MASK32 = 0xFFFFFFFF
+# Words generated per Philox call; bounds temporaries to a few MB whatever the output size
+BLOCK_WORDS = 1 << 16
+
+def resolve_seed(payload):
+    """Job seed from the payload, or a fresh one that the caller reports back"""
+    seed = payload.get('seed')
+    if seed is None:
+        import secrets
+        seed = secrets.randbits(63)
+    return int(seed)
+
+def stream_id(name):
+    """Stable 32-bit id for a named stream within a job (e.g. 'matrix_a', 'light3')"""
+    return zlib.crc32(name.encode())
+
+def _mulhilo32(a, b):
+    """32x32->64 bit multiply on int64 tensors without overflowing the sign bit"""
+    b_lo = b & 0xFFFF
+    b_hi = b >> 16
+    p_lo = a * b_lo
+    t = (p_lo >> 16) + a * b_hi
+    hi = t >> 16
+    lo = ((t & 0xFFFF) << 16) | (p_lo & 0xFFFF)
+    return hi, lo
+
+def philox4x32(c0, c1, c2, c3, k0, k1):
+    """Philox4x32-10 over int64 tensors holding 32-bit counter words"""
+    for _ in range(PHILOX_ROUNDS):
+        hi0, lo0 = _mulhilo32(PHILOX_M0, c0)
+        hi1, lo1 = _mulhilo32(PHILOX_M1, c2)
+        c0, c1, c2, c3 = hi1 ^ c1 ^ k0, lo1, hi0 ^ c3 ^ k1, lo0
+        k0 = (k0 + PHILOX_W0) & MASK32
+        k1 = (k1 + PHILOX_W1) & MASK32
+    return c0, c1, c2, c3
+
+def _philox_words(seed, stream, offset, count, device):
+    """Words [offset, offset + count) of a stream in one Philox call"""
+    import torch
+
+    # Element j of a stream is word j % 4 of the block at counter j // 4
+    first_block = offset // 4
+    last_block = (offset + count + 3) // 4
+    blocks = torch.arange(first_block, last_block, dtype=torch.int64, device=device)
+
+    # Key = job seed; counter = (block index, stream id)
+    k0 = seed & MASK32
+    k1 = (seed >> 32) & MASK32
+    c0 = blocks & MASK32
+    c1 = (blocks >> 32) & MASK32
+    c2 = torch.full_like(blocks, stream & MASK32)
+    c3 = torch.zeros_like(blocks)
+
+    words = torch.stack(philox4x32(c0, c1, c2, c3, k0, k1), dim=1).reshape(-1)
+    start = offset - first_block * 4
+    return words[start:start + count]
+
+def _fill_blocks(out, make_block, block_size=BLOCK_WORDS):
+    """Fill contiguous `out` in order; make_block(start, count) returns the next `count` values"""
+    flat = out.view(-1)
+    total = flat.numel()
+    for start in range(0, total, block_size):
+        count = min(block_size, total - start)
+        flat[start:start + count] = make_block(start, count)
+    return out
+
+def random_words(seed, stream, offset, count, device='cpu'):
+    """`count` uniform 32-bit words (as int64) starting at element `offset` of a stream"""
+    import torch
+
+    if isinstance(stream, str):
+        stream = stream_id(stream)
+    if count <= BLOCK_WORDS:
+        return _philox_words(seed, stream, offset, count, device)
+    words = torch.empty(count, dtype=torch.int64, device=device)
+    return _fill_blocks(words, lambda start, n: _philox_words(seed, stream, offset + start, n, device))
+
+def uniform(seed, stream, shape, offset=0, device='cpu', out=None):
+    """Float32 uniforms in [0, 1) with 24-bit resolution; exact on every device"""
+    import torch
+
+    def make_block(start, count):
+        words = random_words(seed, stream, offset + start, count, device)
+        return (words >> 8).to(torch.float32) * (1.0 / (1 << 24))
+
+    if out is None:
+        out = torch.empty(tuple(shape), dtype=torch.float32, device=device)
+    return _fill_blocks(out, make_block)
+
+def _normal_block(seed, stream, offset, count, device):
+    """Normals [offset, offset + count) of a stream via Box-Muller"""
+    import math
+    import torch
+
+    # Normals 2i and 2i+1 share the word pair (2i, 2i+1); offsets are in normals
+    first_pair = offset // 2
+    pairs = (offset + count + 1) // 2 - first_pair
+    words = random_words(seed, stream, first_pair * 2, pairs * 2, device).view(pairs, 2)
+    u1 = ((words[:, 0] >> 8).to(torch.float32) + 1.0) * (1.0 / (1 << 24))  # (0, 1], safe for log
+    u2 = (words[:, 1] >> 8).to(torch.float32) * (1.0 / (1 << 24))
+    radius = torch.sqrt(-2.0 * torch.log(u1))
+    angle = 2.0 * math.pi * u2
+    values = torch.stack([radius * torch.cos(angle), radius * torch.sin(angle)], dim=1).reshape(-1)
+    start = offset - first_pair * 2
+    return values[start:start + count]
+
+def normal(seed, stream, shape, offset=0, device='cpu', out=None):
+    """Standard normals via Box-Muller over a uniform stream"""
+    import torch
+
+    if out is None:
+        out = torch.empty(tuple(shape), dtype=torch.float32, device=device)
+    return _fill_blocks(out, lambda start, count: _normal_block(seed, stream, offset + start, count, device))
+
+def randint(seed, stream, low, high, shape, offset=0, device='cpu', out=None):
+    """Integers in [low, high) as int64"""
+    import torch
+
+    def make_block(start, count):
+        return low + random_words(seed, stream, offset + start, count, device) % (high - low)
+
+    if out is None:
+        out = torch.empty(tuple(shape), dtype=torch.int64, device=device)
+    return _fill_blocks(out, make_block)
@@ -0,0 +1,146 @@
+# stream_output.py
+# Incremental JSON/base64 writers so large results are never held as one big string
+import os
+import json
+import base64
+from io import BytesIO
+
+# Base64 works on 3-byte groups; encode in chunks that are a multiple of 3
+BASE64_CHUNK = 3 * 16384
+
+class Base64Writer:
+    """File-like sink that base64-encodes written bytes straight into a text stream"""
+
+    def __init__(self, out):
+        self.out = out
+        self.pending = b''
+
+    def write(self, data):
+        size = len(data)
+        if self.pending:
+            data = self.pending + bytes(data)
+        data = memoryview(data)
+        usable = len(data) - len(data) % 3
+        for start in range(0, usable, BASE64_CHUNK):
+            self.out.write(base64.b64encode(data[start:min(start + BASE64_CHUNK, usable)]).decode('ascii'))
+        self.pending = bytes(data[usable:])
+        return size
+
+    def flush(self):
+        pass
+
+    def close(self):
+        # Only the final group may carry '=' padding
+        if self.pending:
+            self.out.write(base64.b64encode(self.pending).decode('ascii'))
+            self.pending = b''
+
+class DeferredBase64:
+    """JSON string value `prefix + base64(bytes)` whose bytes are produced only at output time.
+
+    `write_bytes` is called with a binary file-like object (e.g. PIL's Image.save).
+    write_result runs it via prepare() before writing anything, so an encoder failure
+    never leaves half an envelope behind; only the raw bytes are held, and the base64
+    text goes straight to the output.
+    """
+
+    def __init__(self, prefix, write_bytes):
+        self.prefix = prefix
+        self.write_bytes = write_bytes
+        self.data = None
+
+    def prepare(self):
+        if self.data is None:
+            buffered = BytesIO()
+            self.write_bytes(buffered)
+            self.data = buffered.getbuffer()
+
+    def write_to(self, out):
+        self.prepare()
+        out.write('"' + self.prefix)
+        writer = Base64Writer(out)
+        writer.write(self.data)
+        writer.close()
+        out.write('"')
+
+def _json_key(key):
+    """Quoted object key, encoded the way json.dumps encodes non-string keys (True -> "true")"""
+    if isinstance(key, str):
+        return json.dumps(key)
+    if isinstance(key, (bool, int, float)) or key is None:
+        # Scalars dump to their JSON literal, which then becomes the key string
+        return json.dumps(json.dumps(key))
+    raise TypeError(f'keys must be str, int, float, bool or None, not {type(key).__name__}')
+
+def prepare_json(value):
+    """Run deferred encoders and check every key and leaf, so write_json cannot fail midway"""
+    if isinstance(value, DeferredBase64):
+        value.prepare()
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            _json_key(key)
+            prepare_json(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            prepare_json(item)
+    elif not (isinstance(value, (str, int, float)) or value is None):
+        raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+def write_json(value, out):
+    """Write `value` like json.dumps would, streaming any DeferredBase64 fields"""
+    if isinstance(value, DeferredBase64):
+        value.write_to(out)
+    elif isinstance(value, dict):
+        out.write('{')
+        for index, (key, item) in enumerate(value.items()):
+            if index:
+                out.write(', ')
+            out.write(_json_key(key) + ': ')
+            write_json(item, out)
+        out.write('}')
+    elif isinstance(value, (list, tuple)):
+        out.write('[')
+        for index, item in enumerate(value):
+            if index:
+                out.write(', ')
+            write_json(item, out)
+        out.write(']')
+    else:
+        out.write(json.dumps(value))
+
+def write_result(result, output_path=None, out=None):
+    """Write a result envelope as one JSON line to a file or the given stream.
+
+    Nothing is written if encoding fails, so callers can still report a clean error.
+    """
+    prepare_json(result)
+    if output_path:
+        # Readers never see a partial file: write beside it, then rename over it
+        temp_path = f'{output_path}.{os.getpid()}.tmp'
+        try:
+            with open(temp_path, 'w') as f:
+                write_json(result, f)
+                f.write('\n')
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return
+    write_json(result, out)
+    out.write('\n')
+    out.flush()
+
+def summarize_result(result, limit=100):
+    """Short log line for a result without serializing large fields"""
+    parts = []
+    for key, value in result.items():
+        if isinstance(value, DeferredBase64):
+            text = f'<streamed {value.prefix}...>'
+        elif isinstance(value, str) and len(value) > limit:
+            text = f'<{len(value)} chars>'
+        elif isinstance(value, (dict, list)):
+            text = f'<{type(value).__name__}>'
+        else:
+            text = repr(value)
+        parts.append(f'{key}={text}')
+    return ', '.join(parts)
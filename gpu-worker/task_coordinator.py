@@ -0,0 +1,264 @@
+# task_coordinator.py
+# Throughput-aware job coordinator: sizes chunks per peer and speculatively re-dispatches stragglers
+import sys
+import json
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from task_splitter import split_task
+from task_aggregator import aggregate_results
+
+class TaskCoordinator:
+    """Runs jobs across peers, learning each peer's throughput (items/sec) as it goes.
+
+    `peers` maps a peer id to a callable that takes a chunk (list of items) and
+    returns a list with one result per item; it may raise or hang.
+    """
+
+    def __init__(self, peers, alpha=0.3, initial_throughput=None, speculation_factor=2.0,
+                 min_speculation_delay=0.05, max_attempts=3, units_per_peer=8, min_throughput=1.0):
+        self.peers = dict(peers)
+        self.alpha = alpha
+        self.speculation_factor = speculation_factor
+        self.min_speculation_delay = min_speculation_delay
+        # Cap on dispatches per chunk, counting speculative copies and failure retries
+        self.max_attempts = max_attempts
+        self.min_throughput = min_throughput
+        self.units_per_peer = units_per_peer
+        # Exponentially-weighted throughput estimate per peer; None until first observation
+        self.throughput = {peer_id: initial_throughput for peer_id in self.peers}
+
+    def estimate(self, peer_id):
+        """Current throughput estimate, falling back to the mean of known peers"""
+        known = [value for value in self.throughput.values() if value]
+        default = sum(known) / len(known) if known else 1.0
+        return self.throughput.get(peer_id) or default
+
+    def record_success(self, peer_id, items, elapsed):
+        observed = items / max(elapsed, 1e-6)
+        previous = self.throughput.get(peer_id)
+        if previous is None:
+            self.throughput[peer_id] = observed
+        else:
+            self.throughput[peer_id] = self.alpha * observed + (1 - self.alpha) * previous
+
+    def record_failure(self, peer_id):
+        # Decay so failing peers get smaller chunks next time; the floor keeps deadlines finite
+        self.throughput[peer_id] = max(self.min_throughput, self.estimate(peer_id) * (1 - self.alpha))
+
+    def plan_chunks(self, data):
+        """Split data into one contiguous chunk per peer, sized by estimated throughput"""
+        peer_ids = list(self.peers)
+        num_units = min(len(data), len(peer_ids) * self.units_per_peer)
+        if num_units == 0:
+            return []
+        units = split_task(list(data), num_units)
+
+        # Largest-remainder allocation of equal units in proportion to throughput
+        estimates = [self.estimate(peer_id) for peer_id in peer_ids]
+        total = sum(estimates)
+        quotas = [num_units * estimate / total for estimate in estimates]
+        counts = [int(quota) for quota in quotas]
+        by_remainder = sorted(range(len(peer_ids)), key=lambda i: quotas[i] - counts[i], reverse=True)
+        for i in by_remainder[:num_units - sum(counts)]:
+            counts[i] += 1
+
+        chunks = []
+        position = 0
+        for peer_id, count in zip(peer_ids, counts):
+            if count:
+                chunk = [item for unit in units[position:position + count] for item in unit]
+                chunks.append((peer_id, chunk))
+                position += count
+        return chunks
+
+    def pick_backup_peer(self, exclude, in_flight):
+        """Fastest peer not already running this chunk, preferring less loaded peers"""
+        candidates = [peer_id for peer_id in self.peers if peer_id not in exclude]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda peer_id: self.estimate(peer_id) / (1 + in_flight.get(peer_id, 0)))
+
+    def run_job(self, data, operation='sum'):
+        """Run one job; returns (aggregate, report)"""
+        start_time = time.time()
+        chunks = self.plan_chunks(data)
+        results = [None] * len(chunks)
+        attempts = {index: set() for index in range(len(chunks))}
+        attempt_counts = [0] * len(chunks)
+        running = {}  # future -> (chunk index, peer id, start time, deadline)
+        in_flight = {}
+        speculative = 0
+        failures = 0
+
+        executor = ThreadPoolExecutor(max_workers=len(self.peers) * self.max_attempts)
+
+        def dispatch(index, peer_id):
+            chunk = chunks[index][1]
+            expected = len(chunk) / self.estimate(peer_id)
+            now = time.time()
+            deadline = now + max(self.min_speculation_delay, self.speculation_factor * expected)
+            future = executor.submit(self.peers[peer_id], chunk)
+            running[future] = (index, peer_id, now, deadline)
+            attempts[index].add(peer_id)
+            attempt_counts[index] += 1
+            in_flight[peer_id] = in_flight.get(peer_id, 0) + 1
+
+        for index, (peer_id, _) in enumerate(chunks):
+            dispatch(index, peer_id)
+
+        try:
+            while any(result is None for result in results):
+                if not running:
+                    raise RuntimeError('All attempts failed for at least one chunk')
+
+                next_deadline = min(entry[3] for entry in running.values())
+                timeout = None if next_deadline == float('inf') else max(0.0, next_deadline - time.time())
+                done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    index, peer_id, started, _ = running.pop(future)
+                    in_flight[peer_id] -= 1
+                    try:
+                        chunk_result = future.result()
+                    except Exception as e:
+                        print(f'Peer {peer_id} failed chunk {index}: {e}', file=sys.stderr)
+                        failures += 1
+                        self.record_failure(peer_id)
+                        # Retry straight away unless another attempt is still running
+                        if results[index] is None and not any(entry[0] == index for entry in running.values()):
+                            if attempt_counts[index] >= self.max_attempts:
+                                raise RuntimeError(f'Chunk {index} failed on all {attempt_counts[index]} attempts')
+                            # Fall back to any peer once every peer has been tried
+                            backup = self.pick_backup_peer(attempts[index], in_flight) or \
+                                self.pick_backup_peer(set(), in_flight)
+                            dispatch(index, backup)
+                        continue
+
+                    self.record_success(peer_id, len(chunks[index][1]), time.time() - started)
+                    # First result for each chunk wins; late duplicates only feed the estimates
+                    if results[index] is None:
+                        results[index] = chunk_result
+
+                # Speculatively duplicate chunks that have overrun their deadline
+                now = time.time()
+                for future, (index, peer_id, started, deadline) in list(running.items()):
+                    if results[index] is not None:
+                        # Losing duplicate: still tracked for estimates, never speculated on
+                        running[future] = (index, peer_id, started, float('inf'))
+                        continue
+                    if now < deadline:
+                        continue
+                    if attempt_counts[index] < self.max_attempts:
+                        backup = self.pick_backup_peer(attempts[index], in_flight)
+                        if backup is not None:
+                            speculative += 1
+                            dispatch(index, backup)
+                    # Don't re-check this attempt until its estimate has elapsed again
+                    running[future] = (index, peer_id, started, now + max(self.min_speculation_delay, deadline - started))
+        finally:
+            # Stragglers keep running in their threads but nobody waits for them
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        flat_results = [item for chunk_result in results for item in chunk_result]
+        report = {
+            'time': round(time.time() - start_time, 4),
+            'chunks': len(chunks),
+            'speculativeDispatches': speculative,
+            'failures': failures,
+            'throughput': {peer_id: round(self.estimate(peer_id), 1) for peer_id in self.peers}
+        }
+        return aggregate_results(flat_results, operation), report
+
+def make_fake_peer(speed, failure_rate=0.0, stall_rate=0.0, stall_time=2.0, jitter=0.2, rng=None):
+    """Simulated peer processing `speed` items/sec that sometimes fails or stalls"""
+    rng = rng or random.Random()
+
+    def run(chunk):
+        if rng.random() < failure_rate:
+            time.sleep(rng.random() * len(chunk) / speed)
+            raise RuntimeError('simulated peer failure')
+        duration = len(chunk) / speed * (1 + rng.uniform(-jitter, jitter))
+        if rng.random() < stall_rate:
+            duration += stall_time
+        time.sleep(duration)
+        return list(chunk)
+
+    return run
+
+def run_baseline_job(peers, data, operation='sum'):
+    """Equal split_task chunks, wait for every result, retry a failed chunk on the same peer"""
+    start_time = time.time()
+    peer_ids = list(peers)
+    chunks = split_task(list(data), len(peer_ids))
+
+    def run_with_retry(peer_id, chunk):
+        while True:
+            try:
+                return peers[peer_id](chunk)
+            except Exception:
+                continue
+
+    with ThreadPoolExecutor(max_workers=len(peer_ids)) as executor:
+        futures = [executor.submit(run_with_retry, peer_id, chunk) for peer_id, chunk in zip(peer_ids, chunks)]
+        results = [item for future in futures for item in future.result()]
+    return aggregate_results(results, operation), time.time() - start_time
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def simulate(peer_specs, jobs=20, items=400, seed=0):
+    """Compare baseline and coordinator job latency over fake peers"""
+    rng = random.Random(seed)
+    peers = {
+        spec['id']: make_fake_peer(spec['speed'], spec.get('failureRate', 0.0), spec.get('stallRate', 0.0),
+                                   spec.get('stallTime', 2.0), rng=random.Random(rng.random()))
+        for spec in peer_specs
+    }
+    data = list(range(items))
+    expected = aggregate_results(data, 'sum')
+
+    baseline_times = []
+    for _ in range(jobs):
+        total, elapsed = run_baseline_job(peers, data)
+        assert total == expected
+        baseline_times.append(elapsed)
+
+    coordinator = TaskCoordinator(peers)
+    coordinator_times = []
+    report = None
+    for _ in range(jobs):
+        total, report = coordinator.run_job(data)
+        assert total == expected
+        coordinator_times.append(report['time'])
+
+    def summary(times):
+        return {
+            'p50': round(percentile(times, 0.5), 3),
+            'p95': round(percentile(times, 0.95), 3),
+            'max': round(max(times), 3)
+        }
+
+    return {
+        'baseline': summary(baseline_times),
+        'coordinator': summary(coordinator_times),
+        'learnedThroughput': report['throughput']
+    }
+
+# Example usage:
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        peer_specs = json.loads(sys.argv[1])
+        jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    else:
+        # One fast, two average, one slow and flaky peer that occasionally stalls
+        peer_specs = [
+            {'id': 'fast', 'speed': 4000},
+            {'id': 'avg1', 'speed': 2000},
+            {'id': 'avg2', 'speed': 2000, 'failureRate': 0.05},
+            {'id': 'slow', 'speed': 500, 'failureRate': 0.1, 'stallRate': 0.2, 'stallTime': 1.0}
+        ]
+        jobs = 20
+    print(json.dumps(simulate(peer_specs, jobs), indent=2))
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+import subprocess
+import json
+import torch
+
+from rng_streams import philox4x32
+
+# Known-answer vectors for Philox4x32-10 from the Random123 distribution (kat_vectors)
+known_answers = [
+    ((0x00000000, 0x00000000, 0x00000000, 0x00000000), (0x00000000, 0x00000000),
+     (0x6627e8d5, 0xe169c58d, 0xbc57ac4c, 0x9b00dbd8)),
+    ((0xffffffff, 0xffffffff, 0xffffffff, 0xffffffff), (0xffffffff, 0xffffffff),
+     (0x408f276d, 0x41c83b0e, 0xa20bc7c6, 0x6d5451fd)),
+    ((0x243f6a88, 0x85a308d3, 0x13198a2e, 0x03707344), (0xa4093822, 0x299f31d0),
+     (0xd16cfe09, 0x94fdcceb, 0x5001e420, 0x24126ea1)),
+]
+
+for counter, key, expected in known_answers:
+    words = philox4x32(*[torch.tensor([c], dtype=torch.int64) for c in counter], *key)
+    actual = tuple(int(w) for w in words)
+    print("philox", [hex(c) for c in counter], "->", [hex(w) for w in actual])
+    assert actual == expected, f"expected {[hex(w) for w in expected]}"
+
+# A Monte Carlo job split into chunks must count exactly the same samples as one run
+def run_monte_carlo(payload):
+    result = subprocess.run([
+        'python', 'gpu_task_runner.py',
+        json.dumps({"operation": "monte_carlo", **payload})
+    ], capture_output=True, text=True, cwd='.')
+    print("stderr:", result.stderr)
+    return json.loads(result.stdout)
+
+whole = run_monte_carlo({"simulations": 100000, "seed": 7})
+first = run_monte_carlo({"simulations": 30000, "sampleOffset": 0, "seed": 7})
+second = run_monte_carlo({"simulations": 70000, "sampleOffset": 30000, "seed": 7})
+
+print("unsplit inside_circle:", whole['inside_circle'])
+print("split inside_circle:", first['inside_circle'], "+", second['inside_circle'])
+assert first['inside_circle'] + second['inside_circle'] == whole['inside_circle']
+print("all rng stream checks passed")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+import io
+import os
+import json
+import base64
+import tempfile
+import subprocess
+
+from stream_output import write_json, write_result, DeferredBase64
+
+# write_json must produce exactly what json.dumps does, keys included
+cases = [
+    {"result": "ok", "nested": {"list": [1, 2.5, None, True], "empty": {}}, "text": "quote \" and é"},
+    {True: 1, False: 0, None: "null key", 3: "int", 1.5: "float", "str": [], float("inf"): "inf"},
+    [{"a": (1, 2)}, [], "plain"],
+]
+
+for value in cases:
+    out = io.StringIO()
+    write_json(value, out)
+    print("write_json:", out.getvalue())
+    assert out.getvalue() == json.dumps(value), f"json.dumps gives {json.dumps(value)}"
+
+# Deferred fields stream the same bytes json.dumps would write for the encoded string
+payload = bytes(range(256)) * 41 + b"tail"
+out = io.StringIO()
+write_json({"frameData": DeferredBase64("data:image/png;base64,", lambda f: f.write(payload)), 1: True}, out)
+expected = json.dumps({"frameData": "data:image/png;base64," + base64.b64encode(payload).decode(), 1: True})
+assert out.getvalue() == expected
+
+# A failing encoder must leave the output untouched so the caller can report a clean error
+def failing_encoder(f):
+    f.write(b"partial frame")
+    raise ValueError("cannot write empty image")
+
+out = io.StringIO()
+try:
+    write_result({"result": "ok", "frameData": DeferredBase64("data:image/png;base64,", failing_encoder)}, out=out)
+    raise AssertionError("write_result should have raised")
+except ValueError:
+    pass
+print("stdout after failed write:", repr(out.getvalue()))
+assert out.getvalue() == ""
+
+with tempfile.TemporaryDirectory() as directory:
+    result_path = os.path.join(directory, "result.json")
+    with open(result_path, "w") as f:
+        f.write("previous\n")
+    try:
+        write_result({"frameData": DeferredBase64("", failing_encoder)}, result_path)
+        raise AssertionError("write_result should have raised")
+    except ValueError:
+        pass
+    with open(result_path) as f:
+        assert f.read() == "previous\n"
+    assert os.listdir(directory) == ["result.json"]
+
+# End to end: a render that fails while encoding prints exactly one parseable error object
+result = subprocess.run([
+    'python', 'game_renderer.py',
+    json.dumps({"operation": "render_frame", "viewport": {"x": 0, "y": 0, "width": 0, "height": 10}})
+], capture_output=True, text=True, cwd='.')
+print("stdout:", result.stdout)
+assert list(json.loads(result.stdout)) == ["error"]
+print("all stream output checks passed")